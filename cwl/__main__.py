@@ -0,0 +1,7 @@
+"""Run the cwl-parsl command line entry point with `python -m cwl`"""
+
+import sys
+
+from cwl.cli import main
+
+sys.exit(main())
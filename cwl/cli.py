@@ -0,0 +1,103 @@
+"""cwl-parsl command line entry point to run a CWL CommandLineTool for a stream of jobs"""
+
+import argparse
+import runpy
+import sys
+from typing import List, Optional
+
+import parsl
+from parsl.configs.local_threads import config as local_threads_config
+
+from cwl.cwl_app.backends import BACKENDS
+from cwl.cwl_app.cwl_app import CWLApp
+from cwl.cwl_app.jobs import JOB_FORMATS, iter_jobs, run_jobs
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"should be at least 1, got {value}")
+
+    return number
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse the command line arguments
+
+    Args:
+        argv (Optional[List[str]]): arguments, defaults to sys.argv[1:]
+
+    Returns:
+        argparse.Namespace: parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        prog="cwl-parsl",
+        description="Run a CWL CommandLineTool with Parsl for each job of a job file.",
+    )
+    parser.add_argument("tool", help="CWL file of the CommandLineTool")
+    parser.add_argument(
+        "jobs", help="job file with NDJSON lines, YAML documents or a JSON job. - for stdin"
+    )
+    parser.add_argument(
+        "--format",
+        choices=JOB_FORMATS,
+        help="format of the job file. Guessed from the extension, NDJSON for stdin",
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=_positive_int,
+        default=100,
+        help="maximum number of jobs running or waiting to run (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=tuple(BACKENDS),
+        default="bash",
+        help="how to run the tool (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--config",
+        help="python file defining a parsl `config`. Defaults to local threads",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="skip jobs whose outputs are up to date",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the tool for each job
+
+    Args:
+        argv (Optional[List[str]]): arguments, defaults to sys.argv[1:]
+
+    Returns:
+        int: exit code, 1 if any job failed
+    """
+    args = parse_args(argv)
+    app = CWLApp(args.tool, incremental=args.incremental, backend=args.backend)
+
+    if args.backend != "local":
+        if args.config:
+            config = runpy.run_path(args.config)["config"]
+        else:
+            config = local_threads_config
+
+        parsl.load(config)
+
+    def report_failure(index: int, exception: BaseException) -> None:
+        print(f"job {index} failed: {exception}", file=sys.stderr)
+
+    try:
+        succeeded, failed = run_jobs(
+            app, iter_jobs(args.jobs, args.format), args.max_in_flight, report_failure
+        )
+    finally:
+        if args.backend != "local":
+            parsl.dfk().cleanup()
+            parsl.clear()
+
+    print(f"{succeeded} jobs succeeded, {failed} jobs failed", file=sys.stderr)
+    return 1 if failed else 0
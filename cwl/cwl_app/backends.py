@@ -0,0 +1,282 @@
+"""Module with the backends that run the rendered command of a CWLApp invocation"""
+
+import os
+import subprocess
+import threading
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Literal, Optional, Union
+
+from parsl.app.app import bash_app, python_app
+from parsl.app.errors import BashExitFailure, MissingOutputs
+from parsl.app.futures import DataFuture
+from parsl.data_provider.files import File
+
+from cwl.cwl_app.staging import SYMLINK, WorkDirEntry, prepare_command
+
+# Output of a command run by the python backend. stdout/stderr are None
+# when they were written to the stdout/stderr files instead.
+CommandResult = namedtuple("CommandResult", ["returncode", "stdout", "stderr"])
+
+# stdout/stderr larger than this are written to the stdout/stderr files
+DEFAULT_MAX_IN_MEMORY_OUTPUT = 1024 * 1024
+
+
+class Backend:
+    """Base class for the ways to run the command of a CWLApp invocation"""
+
+    def submit(self, args: Dict[str, Any]) -> Future:
+        """Run the command
+
+        Args:
+            args (Dict[str, Any]): command, stdout, stderr, inputs, outputs, workdir,
+                initial_workdir and staging of the invocation
+
+        Returns:
+            Future: future with an `outputs` list of DataFutures
+        """
+        raise NotImplementedError
+
+    def reusable(self, result: Any) -> bool:  # pylint: disable=unused-argument
+        """Check if a successful run can be skipped next time in incremental mode
+
+        Args:
+            result (Any): result of the run
+
+        Returns:
+            bool: True if the output files hold everything the run produced
+        """
+        return True
+
+    def skipped_result(self) -> Any:
+        """Result of an invocation skipped in incremental mode"""
+        return 0
+
+
+def _bash_command(
+    command: str,
+    stdout: str = None,
+    stderr: str = None,
+    inputs: List[File] = None,
+    outputs: List[File] = None,
+    workdir: str = None,
+    initial_workdir: List[WorkDirEntry] = None,
+    staging: str = SYMLINK,
+) -> str:
+    return prepare_command(command, workdir, initial_workdir, inputs, staging)
+
+
+class BashAppBackend(Backend):
+    """Run the command with a Parsl bash_app"""
+
+    def __init__(self, executors: Union[List[str], Literal["all"]] = "all") -> None:
+        """Run the command with a Parsl bash_app
+
+        Args:
+            executors (Union[List[str], Literal["all"]]): labels of the executors to run on
+        """
+        self.executors = executors
+        self.__app = bash_app(_bash_command, executors=executors)
+
+    def submit(self, args: Dict[str, Any]) -> Future:
+        return self.__app(**args)
+
+
+def _python_command(
+    command: str,
+    stdout: str = None,
+    stderr: str = None,
+    inputs: List[File] = None,
+    outputs: List[File] = None,
+    workdir: str = None,
+    initial_workdir: List[WorkDirEntry] = None,
+    staging: str = SYMLINK,
+    max_in_memory_output: int = DEFAULT_MAX_IN_MEMORY_OUTPUT,
+):
+    command = prepare_command(command, workdir, initial_workdir, inputs, staging)
+    proc = subprocess.run(
+        command, shell=True, executable="/bin/bash", capture_output=True, check=False
+    )
+
+    def keep_or_write(data, path):
+        # failed commands keep their output in the files, for debugging and retries
+        if path is None or (proc.returncode == 0 and len(data) <= max_in_memory_output):
+            return data.decode(errors="replace")
+
+        with open(path, "ab") as f:
+            f.write(data)
+        return None
+
+    result = CommandResult(
+        proc.returncode, keep_or_write(proc.stdout, stdout), keep_or_write(proc.stderr, stderr)
+    )
+
+    if proc.returncode != 0:
+        raise BashExitFailure(command, proc.returncode)
+
+    missing = [f for f in outputs or [] if not os.path.exists(f.filepath)]
+    if missing:
+        raise MissingOutputs("Missing outputs", missing)
+
+    return result
+
+
+class PythonAppBackend(Backend):
+    """Run the command in a subprocess from a Parsl python_app
+
+    The app returns a CommandResult with the captured stdout and stderr.
+    The stdout/stderr files are only spill-over paths: they are written when
+    the output is larger than max_in_memory_output bytes or the command fails.
+    In incremental mode only runs whose stdout and stderr were both written to
+    the files are skipped, since the output kept in memory can't be reused.
+    """
+
+    def __init__(
+        self,
+        executors: Union[List[str], Literal["all"]] = "all",
+        max_in_memory_output: int = DEFAULT_MAX_IN_MEMORY_OUTPUT,
+    ) -> None:
+        """Run the command in a subprocess from a Parsl python_app
+
+        Args:
+            executors (Union[List[str], Literal["all"]]): labels of the executors to run on
+            max_in_memory_output (int): size in bytes above which stdout/stderr
+                are written to their files
+        """
+        self.executors = executors
+        self.max_in_memory_output = max_in_memory_output
+        self.__app = python_app(_python_command, executors=executors)
+
+    def submit(self, args: Dict[str, Any]) -> Future:
+        return self.__app(**args, max_in_memory_output=self.max_in_memory_output)
+
+    def reusable(self, result: Any) -> bool:
+        return result.stdout is None and result.stderr is None
+
+    def skipped_result(self) -> Any:
+        # the output is in the stdout/stderr files
+        return CommandResult(0, None, None)
+
+
+class LocalAppFuture(Future):
+    """Future for a CWLApp invocation that doesn't go through a DataFlowKernel"""
+
+    def __init__(
+        self,
+        outputs: List[Union[File, DataFuture]],
+        stdout: Optional[str] = None,
+        stderr: Optional[str] = None,
+    ) -> None:
+        """Future with DataFutures for the output files of the invocation
+
+        Args:
+            outputs (List[Union[File, DataFuture]]): Output files of the invocation
+            stdout (Optional[str]): stdout file of the invocation
+            stderr (Optional[str]): stderr file of the invocation
+        """
+        super().__init__()
+        self.stdout = stdout
+        self.stderr = stderr
+        self.outputs = [
+            DataFuture(self, f.file_obj if isinstance(f, DataFuture) else f, tid=-1)
+            for f in outputs
+        ]
+
+
+class LocalBackend(Backend):
+    """Run the command with a concurrent.futures thread pool, without a DataFlowKernel"""
+
+    def __init__(self, max_workers: Optional[int] = None) -> None:
+        """Run the command with a concurrent.futures thread pool
+
+        Args:
+            max_workers (Optional[int]): Number of threads of the pool
+        """
+        self.__executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="cwl-local-backend"
+        )
+
+    def submit(self, args: Dict[str, Any]) -> Future:
+        future = LocalAppFuture(args["outputs"], args["stdout"], args["stderr"])
+
+        # the task only goes to the pool once all its input files are ready,
+        # so pool threads never wait for other tasks
+        pending = [f for f in args["inputs"] if isinstance(f, Future) and not f.done()]
+        if not pending:
+            self.__executor.submit(self.__run, future, args)
+            return future
+
+        lock = threading.Lock()
+        remaining = [len(pending)]
+
+        def input_done(_):
+            with lock:
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+
+            if ready:
+                self.__executor.submit(self.__run, future, args)
+
+        for f in pending:
+            f.add_done_callback(input_done)
+
+        return future
+
+    @staticmethod
+    def __run(future: LocalAppFuture, args: Dict[str, Any]) -> None:
+        try:
+            inputs = [f.result() if isinstance(f, Future) else f for f in args["inputs"]]
+            command = prepare_command(
+                args["command"], args["workdir"], args["initial_workdir"], inputs, args["staging"]
+            )
+
+            # appended to, like the bash_app does
+            with open(args["stdout"] or os.devnull, "ab") as stdout, open(
+                args["stderr"] or os.devnull, "ab"
+            ) as stderr:
+                returncode = subprocess.call(
+                    command, shell=True, executable="/bin/bash", stdout=stdout, stderr=stderr
+                )
+
+            if returncode != 0:
+                raise BashExitFailure(command, returncode)
+
+            missing = [f for f in args["outputs"] if not os.path.exists(f.filepath)]
+            if missing:
+                raise MissingOutputs("Missing outputs", missing)
+
+            future.set_result(returncode)
+
+        except Exception as e:  # pylint: disable=broad-except
+            future.set_exception(e)
+
+
+BACKENDS = {
+    "bash": BashAppBackend,
+    "python": PythonAppBackend,
+    "local": LocalBackend,
+}
+
+# backends with the default options, shared by all the CWLApps
+_default_backends: Dict[str, Backend] = {}
+
+
+def get_backend(backend: Union[str, Backend]) -> Backend:
+    """Backend instance for a backend name
+
+    Args:
+        backend (Union[str, Backend]): bash, python, local or a Backend instance
+
+    Returns:
+        Backend: backend to run the commands with
+    """
+    if isinstance(backend, Backend):
+        return backend
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Invalid backend {backend}. Should be one of {tuple(BACKENDS)}")
+
+    if backend not in _default_backends:
+        _default_backends.setdefault(backend, BACKENDS[backend]())
+
+    return _default_backends[backend]
@@ -2,17 +2,44 @@
 
 import os
 import pprint
+import re
+import tempfile
+import uuid
 from collections import namedtuple
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import yaml
-from parsl.app.app import bash_app
 from parsl.app.futures import DataFuture
 from parsl.data_provider.files import File
 from schema import And
 from schema import Optional as Opt
 from schema import Or, Regex, Schema, SchemaError
 
+from cwl.cwl_app.backends import Backend, LocalAppFuture, get_backend
+from cwl.cwl_app.incremental import (
+    DEFAULT_MANIFEST_FILE,
+    Manifest,
+    SkippedAppFuture,
+    outputs_are_fresh,
+)
+from cwl.cwl_app.retries import (
+    DEFAULT_CWL_MAX_RETRIES,
+    FailureStats,
+    RetryPolicy,
+    submit_with_retries,
+    success_codes_command,
+)
+from cwl.cwl_app.staging import (
+    STAGING_MODES,
+    SYMLINK,
+    WorkDirEntry,
+)
+
+PARAMETER_REFERENCE = r"^\$\(inputs\.([a-zA-Z_][a-zA-Z0-9_]*)(\.path)?\)$"
+
+# keyword arguments of CWLApp.__call__ that can't be CWL input or output ids
+RESERVED_IDS = ("backend",)
+
 
 class InputArgument:
     """Class to represent input arguments for a command line tool"""
@@ -187,12 +214,34 @@ class ArgumentMissing(Exception):
 class CWLApp:
     """Class to represent a CWL Command Line Tool and run it using Parsl"""
 
-    def __init__(self, cwl_file: str) -> None:
+    def __init__(
+        self,
+        cwl_file: str,
+        incremental: bool = False,
+        manifest_file: str = DEFAULT_MANIFEST_FILE,
+        staging: str = SYMLINK,
+        workdir_root: Optional[str] = None,
+        backend: Union[str, Backend] = "bash",
+        retry_policy: Optional[RetryPolicy] = None,
+    ) -> None:
         """Command Line Tool
 
         Args:
             cwl_file (str): CWL specs file for the Command Line Tool
+            incremental (bool): Skip invocations whose outputs are up to date
+            manifest_file (str): File to record the rendered commands in incremental mode
+            staging (str): How to stage InitialWorkDirRequirement files - symlink or hardlink
+            workdir_root (Optional[str]): Directory for the per-task working directories.
+                Defaults to the system temporary directory.
+            backend (Union[str, Backend]): How to run the command - bash (Parsl bash_app),
+                python (subprocess in a Parsl python_app), local (thread pool without
+                a DataFlowKernel) or a Backend instance
+            retry_policy (Optional[RetryPolicy]): How to retry failed invocations. The
+                temporaryFailCodes and permanentFailCodes of the CWL file are added to it.
+                Without it, the temporaryFailCodes are retried DEFAULT_CWL_MAX_RETRIES times.
         """
+        if staging not in STAGING_MODES:
+            raise ValueError(f"Invalid staging mode {staging}. Should be one of {STAGING_MODES}")
 
         with open(cwl_file, "r", encoding="utf-8") as f:
             cwl = yaml.safe_load(f)
@@ -205,6 +254,16 @@ class CWLApp:
         self.__base_command = None
         self.__inputs: List[InputArgument] = None
         self.__outputs: List[OutputArgument] = None
+        self.__incremental = incremental
+        self.__manifest = Manifest(manifest_file) if incremental else None
+        self.__staging = staging
+        self.__workdir_root = workdir_root or tempfile.gettempdir()
+        self.__stdin: Optional[str] = None
+        self.__initial_workdir: List[Tuple[Optional[str], Optional[str], Optional[str], bool]] = []
+        self.__staged_only_inputs = set()
+        self.__backend = get_backend(backend)
+        self.__retry_policy = retry_policy
+        self.__failure_stats = FailureStats()
 
         self.__set_cwl_args__()
 
@@ -218,30 +277,108 @@ class CWLApp:
         if "outputs" in self.__cwl:
             self.__set_outputs(self.__cwl["outputs"])
 
+        reserved = [
+            arg.arg_id
+            for arg in self.__inputs + (self.__outputs or [])
+            if arg.arg_id in RESERVED_IDS
+        ]
+        if reserved:
+            raise InvalidCWL(f"Input and output ids can't be any of {RESERVED_IDS}: {reserved}")
+
+        if "stdin" in self.__cwl:
+            self.__stdin = self.__get_referenced_input(self.__cwl["stdin"])
+
+        self.__set_initial_workdir(self.__cwl.get("requirements", []))
+
+        temporary_fail_codes = self.__cwl.get("temporaryFailCodes", [])
+        permanent_fail_codes = self.__cwl.get("permanentFailCodes", [])
+        if temporary_fail_codes or permanent_fail_codes:
+            # temporaryFailCodes are retried even if no retry_policy was given
+            policy = self.__retry_policy or RetryPolicy(
+                max_retries=DEFAULT_CWL_MAX_RETRIES if temporary_fail_codes else 0
+            )
+            self.__retry_policy = policy.with_fail_codes(temporary_fail_codes, permanent_fail_codes)
+
     def __str__(self) -> str:
         return pprint.pformat(self.__cwl)
 
-    def __call__(self, **kwargs: Any):
+    def __call__(self, backend: Optional[Union[str, Backend]] = None, **kwargs: Any):
         """Run the CWL CommandLineTool using Parsl
 
         Expects: input and output arguments mentioned in the CWL file
 
         Make sure to use the same names for function parameters as
         the input and output arguments in the CWL file.
+
+        backend overrides the backend of the app for this invocation, which is
+        why CWL files can't have an input or output with that id.
+
+        In incremental mode the command is not run if all the output files exist,
+        none of the input files is newer than them and the rendered command is
+        the same as the one recorded in the manifest. An already resolved future
+        is returned in that case. Otherwise the record is removed before the
+        command runs and written back once it succeeds, before the returned
+        future resolves.
         """
+        args = self.__get_backend_args(**kwargs)
+        backend = self.__backend if backend is None else get_backend(backend)
+        if self.__incremental:
+            output_paths = self.__get_output_paths(args)
+            if self.__is_up_to_date(args, output_paths):
+                return SkippedAppFuture(
+                    args["outputs"], args["stdout"], args["stderr"], backend.skipped_result()
+                )
+
+            # the outputs are about to be rewritten, a failed run must not be reused
+            self.__manifest.remove(output_paths)
+
+        if self.__retry_policy is None:
+            future = backend.submit(args)
+            future.add_done_callback(lambda fut: self.__failure_stats.record(fut.exception()))
+
+        else:
+            future = submit_with_retries(backend, args, self.__retry_policy, self.__failure_stats)
+
+        if not self.__incremental:
+            return future
+
+        recorded = LocalAppFuture(args["outputs"], args["stdout"], args["stderr"])
+
+        def record_command(fut):
+            try:
+                result = fut.result()
+                if backend.reusable(result):
+                    self.__manifest.record(output_paths, args["command"])
+            except BaseException as e:  # pylint: disable=broad-except
+                # including the cancellation of the command
+                recorded.set_exception(e)
+            else:
+                recorded.set_result(result)
+
+        future.add_done_callback(record_command)
+        return recorded
+
+    @staticmethod
+    def __get_output_paths(args: Dict[str, Any]) -> List[str]:
+        """Paths of all the files written by the command, including stdout and stderr"""
+        output_paths = [f.filepath for f in args["outputs"]]
+        output_paths.extend(
+            path for path in (args["stdout"], args["stderr"]) if isinstance(path, str)
+        )
+        return output_paths
 
-        @bash_app
-        def __parsl_bash_app__(
-            command: str,
-            stdout: str = None,
-            stderr: str = None,
-            inputs: List[File] = None,
-            outputs: List[File] = None,
-        ) -> str:
-            return command
+    def __is_up_to_date(self, args: Dict[str, Any], output_paths: List[str]) -> bool:
+        """Check if the outputs of a previous run with the same command can be reused"""
+        # input files still being produced by other apps will be rewritten
+        if any(
+            isinstance(f, DataFuture) and (not f.done() or f.exception()) for f in args["inputs"]
+        ):
+            return False
 
-        args = self.__get_parsl_bash_app_args(**kwargs)
-        return __parsl_bash_app__(**args)
+        if self.__manifest.get(output_paths) != args["command"]:
+            return False
+
+        return outputs_are_fresh([f.filepath for f in args["inputs"]], output_paths)
 
     @classmethod
     def validate_cwl(cls, cwl_content: Dict[str, any]) -> Dict[str, any]:
@@ -285,13 +422,30 @@ class CWLApp:
             *input_simple_types,
             *input_array_types,
             *input_optional_types,
+            "stdin",
             error=(
                 "Invalid type for input."
                 "Should be one of array, boolean, int, long, float, double, string, File"
-                "Can be optional or array of these types"
+                "Can be optional or array of these types, or stdin"
             ),
         )
 
+        parameter_reference_schema = Regex(
+            PARAMETER_REFERENCE, error="Only $(inputs.<id>) parameter references are supported"
+        )
+
+        initial_workdir_listing_schema = [
+            Or(
+                parameter_reference_schema,
+                {
+                    Opt("entryname"): str,
+                    "entry": str,
+                    Opt("writable"): bool,
+                },
+                error="Invalid InitialWorkDirRequirement listing entry.",
+            )
+        ]
+
         output_types_schema = Or(
             "stdout",
             "stderr",
@@ -363,6 +517,29 @@ class CWLApp:
                     ],
                     error=("Invalid/Empty 'outputs'."),
                 ),
+                Opt("stdin"): parameter_reference_schema,
+                Opt("successCodes"): [int],
+                Opt("temporaryFailCodes"): [int],
+                Opt("permanentFailCodes"): [int],
+                Opt("requirements"): Or(
+                    {
+                        Opt("InitialWorkDirRequirement"): {
+                            "listing": initial_workdir_listing_schema
+                        },
+                        Opt(str): any,
+                    },
+                    [
+                        Or(
+                            {
+                                "class": "InitialWorkDirRequirement",
+                                "listing": initial_workdir_listing_schema,
+                            },
+                            # other requirements are not validated
+                            And(dict, lambda req: req.get("class") != "InitialWorkDirRequirement"),
+                        )
+                    ],
+                    error="Invalid 'requirements'.",
+                ),
                 Opt(any): any,
             },
         )
@@ -385,6 +562,11 @@ class CWLApp:
         inputs = []
 
         def process_input(arg_id, input_arg):
+            if input_arg["type"] == "stdin":
+                # file piped to the standard input instead of a command line argument
+                self.__stdin = arg_id
+                return InputArgument(arg_id, InputArgument.FILE)
+
             if input_arg["type"] == "array":
                 arg_type = input_arg["items"]
                 array = True
@@ -455,6 +637,70 @@ class CWLApp:
 
         self.__outputs = outputs
 
+    def __get_referenced_input(self, reference: str) -> str:
+        """ID of the input argument in a $(inputs.<id>) parameter reference
+
+        Raises:
+            InvalidCWL if the referenced input is not a File
+        """
+        arg_id = re.match(PARAMETER_REFERENCE, reference).group(1)
+        for input_arg in self.__inputs:
+            if input_arg.arg_id == arg_id and input_arg.arg_type == InputArgument.FILE:
+                return arg_id
+
+        raise InvalidCWL(f"{reference} doesn't refer to an input of type File")
+
+    def __set_initial_workdir(
+        self, requirements: Union[List[Dict[str, Any]], Dict[str, Any]]
+    ) -> None:
+        """Set the InitialWorkDirRequirement listing from CWL
+
+        Inputs staged in the working directory without an inputBinding
+        are left out of the command line.
+
+        Args:
+            requirements (Union[List[Dict[str, Any]], Dict[str, Any]]): CWL requirements
+        """
+        if isinstance(requirements, dict):
+            requirement = requirements.get("InitialWorkDirRequirement")
+
+        else:
+            requirement = next(
+                (req for req in requirements if req["class"] == "InitialWorkDirRequirement"), None
+            )
+
+        if requirement is None:
+            return
+
+        cwl_inputs = self.__cwl["inputs"]
+        if isinstance(cwl_inputs, dict):
+            cwl_inputs = [{"id": arg_id, **input_arg} for arg_id, input_arg in cwl_inputs.items()]
+        bound_inputs = {input_arg["id"] for input_arg in cwl_inputs if "inputBinding" in input_arg}
+
+        for entry in requirement["listing"]:
+            if isinstance(entry, str):
+                entry = {"entry": entry}
+
+            entryname = entry.get("entryname")
+            writable = entry.get("writable", False)
+
+            if re.match(PARAMETER_REFERENCE, entry["entry"]):
+                arg_id = self.__get_referenced_input(entry["entry"])
+                self.__initial_workdir.append((entryname, arg_id, None, writable))
+                if arg_id not in bound_inputs:
+                    self.__staged_only_inputs.add(arg_id)
+
+            elif "$(" in entry["entry"] or "${" in entry["entry"]:
+                raise InvalidCWL(
+                    f"Unsupported expression in InitialWorkDirRequirement: {entry['entry']}"
+                )
+
+            elif entryname is None:
+                raise InvalidCWL("InitialWorkDirRequirement literal entries need an entryname")
+
+            else:
+                self.__initial_workdir.append((entryname, None, entry["entry"], writable))
+
     @property
     def command_template(self) -> str:
         """Synopsis/Template for the command.
@@ -462,10 +708,19 @@ class CWLApp:
         Returns:
             str: template string to show example usage
         """
-        return (
-            f"COMMAND TEMPLATE:\n{self.__base_command} "
-            f"{' '.join([input_arg.to_string_template() for input_arg in self.__inputs])}"
-        )
+        input_templates = [
+            input_arg.to_string_template()
+            for input_arg in self.__inputs
+            if input_arg.arg_id != self.__stdin
+            and input_arg.arg_id not in self.__staged_only_inputs
+        ]
+        template = f"COMMAND TEMPLATE:\n{self.__base_command} {' '.join(input_templates)}"
+        return f"{template} < <{self.__stdin}>" if self.__stdin else template
+
+    @property
+    def failure_stats(self) -> FailureStats:
+        """Attempts, successes, failures, retries and exit codes of the tool's invocations"""
+        return self.__failure_stats
 
     @property
     def cwl_version(self) -> str:
@@ -486,8 +741,22 @@ class CWLApp:
             str: string of the shell command that is to be run
         """
         input_args = []
+        stdin = None
         for input_arg in self.__inputs:
-            if input_arg.arg_id in kwargs:
+            if input_arg.arg_id == self.__stdin:
+                stdin = kwargs.get(input_arg.arg_id)
+                if stdin is None and not input_arg.optional:
+                    raise ArgumentMissing(
+                        f"missing required value for argument: {input_arg.arg_id}"
+                    )
+
+            elif input_arg.arg_id in self.__staged_only_inputs:
+                if input_arg.arg_id not in kwargs and not input_arg.optional:
+                    raise ArgumentMissing(
+                        f"missing required value for argument: {input_arg.arg_id}"
+                    )
+
+            elif input_arg.arg_id in kwargs:
                 input_args.append(input_arg.to_string(kwargs[input_arg.arg_id]))
 
             elif input_arg.default:
@@ -499,20 +768,24 @@ class CWLApp:
             else:
                 raise ArgumentMissing(f"missing required value for argument: {input_arg.arg_id}")
 
-        return f"{self.__base_command} {' '.join(filter(None, input_args))}"
+        command = f"{self.__base_command} {' '.join(filter(None, input_args))}"
+        return f"{command} < {stdin.filepath}" if stdin is not None else command
 
-    def __get_parsl_bash_app_args(self, **kwargs) -> Dict[str, Any]:
-        """Args needed to run the command using Parsl
+    def __get_backend_args(self, **kwargs) -> Dict[str, Any]:
+        """Args needed to run the command with a backend
 
         kwargs: values for inputs and outputs mentioned in the CWL file
 
-        Returns: Dict[str, Any]: Args needed to run the command using Parsl
+        Returns: Dict[str, Any]: Args needed to run the command with a backend
                 args = {
                     "command": str,
                     "stdout": File,
                     "stderr": File,
                     "inputs": [File],
                     "outputs": [File],
+                    "workdir": str,
+                    "initial_workdir": [WorkDirEntry],
+                    "staging": str,
                 }
         """
 
@@ -554,18 +827,35 @@ class CWLApp:
             elif output_arg.arg_type == "File" and output_arg.arg_id not in kwargs:
                 raise ArgumentMissing(f"missing required value for argument: {output_arg.arg_id}")
 
-        # list input files
+        # list input files, remembering where each input argument's files are
         input_files = []
+        input_file_indices = {}
         for file in self.__inputs:
-            input_files.extend(handle_input_output_files(file))
+            files = handle_input_output_files(file)
+            input_file_indices[file.arg_id] = range(len(input_files), len(input_files) + len(files))
+            input_files.extend(files)
 
         # list output files
         output_files = []
         for file in self.__outputs:
             output_files.extend(handle_input_output_files(file))
 
+        workdir = None
+        initial_workdir = []
+        if self.__initial_workdir:
+            workdir = os.path.join(
+                self.__workdir_root,
+                f"{os.path.splitext(self.cwl_file_name)[0]}-{uuid.uuid4().hex}",
+            )
+            initial_workdir = self.__get_initial_workdir_entries(input_files, input_file_indices)
+
+            # the command runs inside the working directory
+            kwargs = {**kwargs, **self.__get_absolute_input_files(**kwargs)}
+
         # get command string
         command = self.get_command(**kwargs)
+        if self.__cwl.get("successCodes"):
+            command = success_codes_command(command, self.__cwl["successCodes"])
 
         cmd_args = {
             "command": command,
@@ -573,6 +863,65 @@ class CWLApp:
             "stderr": stderr,
             "inputs": input_files,
             "outputs": output_files,
+            "workdir": workdir,
+            "initial_workdir": initial_workdir,
+            "staging": self.__staging,
         }
 
         return cmd_args
+
+    def __get_initial_workdir_entries(
+        self, input_files: List[Union[File, DataFuture]], input_file_indices: Dict[str, range]
+    ) -> List[WorkDirEntry]:
+        """InitialWorkDirRequirement listing of a single invocation
+
+        Args:
+            input_files (List[Union[File, DataFuture]]): parsl app inputs
+            input_file_indices (Dict[str, range]): positions of the files of
+                each input argument in the parsl app inputs
+
+        Returns:
+            List[WorkDirEntry]: files to be staged in the working directory
+        """
+        arrays = {input_arg.arg_id for input_arg in self.__inputs if input_arg.array}
+
+        entries = []
+        for entryname, arg_id, content, writable in self.__initial_workdir:
+            if arg_id is None:
+                entries.append(WorkDirEntry(entryname, None, content, writable))
+                continue
+
+            for index in input_file_indices.get(arg_id, []):
+                # arrays are staged into the entryname directory
+                name = entryname
+                if name is None or arg_id in arrays:
+                    basename = os.path.basename(input_files[index].filepath)
+                    name = os.path.join(entryname, basename) if entryname else basename
+
+                entries.append(WorkDirEntry(name, index, None, writable))
+
+        return entries
+
+    def __get_absolute_input_files(self, **kwargs) -> Dict[str, Any]:
+        """File input values with absolute paths, to be rendered in another working directory
+
+        kwargs: input parameters
+
+        Returns:
+            Dict[str, Any]: File input values with absolute paths
+        """
+
+        def absolute(file):
+            return File(os.path.abspath(file.filepath))
+
+        absolute_files = {}
+        for input_arg in self.__inputs:
+            value = kwargs.get(input_arg.arg_id)
+            if input_arg.arg_type != InputArgument.FILE or value is None:
+                continue
+
+            absolute_files[input_arg.arg_id] = (
+                [absolute(v) for v in value] if input_arg.array else absolute(value)
+            )
+
+        return absolute_files
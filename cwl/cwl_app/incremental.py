@@ -0,0 +1,158 @@
+"""Module to support make-style incremental re-execution of CWLApps"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from parsl.app.futures import DataFuture
+from parsl.data_provider.files import File
+
+from cwl.cwl_app.backends import LocalAppFuture
+
+DEFAULT_MANIFEST_FILE = ".cwl_parsl_manifest.json"
+
+# one lock per manifest file, shared by all the Manifests of that file
+_manifest_locks: Dict[str, threading.Lock] = {}
+_manifest_locks_lock = threading.Lock()
+
+
+def _manifest_lock(path: str) -> threading.Lock:
+    with _manifest_locks_lock:
+        return _manifest_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+class Manifest:
+    """Class to record the rendered commands that produced a set of output files"""
+
+    def __init__(self, path: str = DEFAULT_MANIFEST_FILE) -> None:
+        """On-disk manifest of rendered commands keyed by their output files
+
+        Args:
+            path (str): Path of the JSON manifest file
+        """
+        self.path = path
+        self.__lock = _manifest_lock(path)
+        self.__entries: Optional[Dict[str, str]] = None
+
+    @staticmethod
+    def key(output_paths: Sequence[str]) -> str:
+        """Manifest key for a set of output files
+
+        Args:
+            output_paths (Sequence[str]): Paths of the output files
+
+        Returns:
+            str: key independent of the order and spelling of the paths
+        """
+        return "\n".join(sorted(os.path.abspath(path) for path in output_paths))
+
+    def __read(self) -> Dict[str, str]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def __load(self) -> Dict[str, str]:
+        if self.__entries is None:
+            self.__entries = self.__read()
+
+        return self.__entries
+
+    def get(self, output_paths: Sequence[str]) -> Optional[str]:
+        """Rendered command recorded for the output files
+
+        Args:
+            output_paths (Sequence[str]): Paths of the output files
+
+        Returns:
+            Optional[str]: recorded command or None if there is no record
+        """
+        with self.__lock:
+            return self.__load().get(self.key(output_paths))
+
+    def record(self, output_paths: Sequence[str], command: str) -> None:
+        """Record the command that produced the output files and save the manifest
+
+        Args:
+            output_paths (Sequence[str]): Paths of the output files
+            command (str): Rendered command
+        """
+        self.__update(output_paths, command)
+
+    def remove(self, output_paths: Sequence[str]) -> None:
+        """Remove the record of the output files and save the manifest
+
+        Called before the output files are rewritten, so outputs of a failed
+        or interrupted run are never reused, like make's .DELETE_ON_ERROR.
+
+        Args:
+            output_paths (Sequence[str]): Paths of the output files
+        """
+        self.__update(output_paths, None)
+
+    def __update(self, output_paths: Sequence[str], command: Optional[str]) -> None:
+        key = self.key(output_paths)
+        with self.__lock:
+            # other apps may have recorded their commands in the same file
+            entries = self.__read()
+            if command is not None:
+                entries[key] = command
+            elif entries.pop(key, None) is None:
+                self.__entries = entries
+                return
+
+            self.__entries = entries
+
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, indent=2, sort_keys=True)
+
+            os.replace(tmp_path, self.path)
+
+
+def outputs_are_fresh(input_paths: Sequence[str], output_paths: Sequence[str]) -> bool:
+    """Check if all output files exist and none of the input files is newer than them
+
+    Args:
+        input_paths (Sequence[str]): Paths of the input files
+        output_paths (Sequence[str]): Paths of the output files
+
+    Returns:
+        bool: True if the outputs are up to date
+    """
+    if not output_paths:
+        return False
+
+    try:
+        oldest_output = min(os.stat(path).st_mtime_ns for path in output_paths)
+        newest_input = max((os.stat(path).st_mtime_ns for path in input_paths), default=0)
+
+    except FileNotFoundError:
+        return False
+
+    return newest_input <= oldest_output
+
+
+class SkippedAppFuture(LocalAppFuture):
+    """Already resolved future returned in place of an AppFuture for a skipped CWLApp call"""
+
+    def __init__(
+        self,
+        outputs: List[Union[File, DataFuture]],
+        stdout: Optional[str] = None,
+        stderr: Optional[str] = None,
+        result: Any = 0,
+    ) -> None:
+        """Resolved future for an invocation whose outputs are up to date
+
+        Args:
+            outputs (List[Union[File, DataFuture]]): Output files of the invocation
+            stdout (Optional[str]): stdout file of the invocation
+            stderr (Optional[str]): stderr file of the invocation
+            result (Any): result of the future, like the one of the backend
+        """
+        super().__init__(outputs, stdout, stderr)
+        self.set_result(result)
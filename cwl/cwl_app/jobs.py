@@ -0,0 +1,207 @@
+"""Module to load CWL job (parameter) files and run CWLApps for each job"""
+
+import json
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import Future
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+import yaml
+from parsl.data_provider.files import File
+
+logger = logging.getLogger(__name__)
+
+NDJSON = "ndjson"
+YAML = "yaml"
+JSON = "json"
+JOB_FORMATS = (NDJSON, YAML, JSON)
+
+_FORMAT_EXTENSIONS = {
+    ".ndjson": NDJSON,
+    ".jsonl": NDJSON,
+    ".yaml": YAML,
+    ".yml": YAML,
+    ".json": JSON,
+}
+
+
+def job_value(value: Any, base_dir: str = ".") -> Any:
+    """Convert a value of a CWL job to a CWLApp argument
+
+    `class: File` objects become parsl Files. Their relative `path`/`location`
+    is resolved against base_dir, the directory of the job file.
+
+    Args:
+        value (Any): value from the job file
+        base_dir (str): directory relative paths are resolved against
+
+    Returns:
+        Any: CWLApp argument
+    """
+    if isinstance(value, list):
+        return [job_value(v, base_dir) for v in value]
+
+    if not isinstance(value, dict) or value.get("class") not in ("File", "Directory"):
+        return value
+
+    if "path" in value:
+        path = value["path"]
+
+    elif "location" in value:
+        location = urlparse(value["location"])
+        if location.scheme not in ("", "file"):
+            # remote files are staged in by parsl
+            return File(value["location"])
+        path = unquote(location.path)
+
+    else:
+        raise ValueError(f"{value['class']} object without path or location: {value}")
+
+    path = os.path.join(base_dir, path)
+    return File(path) if value["class"] == "File" else path
+
+
+def job_to_kwargs(job: Dict[str, Any], base_dir: str = ".") -> Dict[str, Any]:
+    """CWLApp arguments for a CWL job
+
+    Args:
+        job (Dict[str, Any]): CWL job, input (and output) ids to values
+        base_dir (str): directory relative paths are resolved against
+
+    Returns:
+        Dict[str, Any]: keyword arguments for CWLApp.__call__
+    """
+    return {arg_id: job_value(value, base_dir) for arg_id, value in job.items()}
+
+
+def _job_format(path: str) -> str:
+    job_format = _FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if job_format is None:
+        raise ValueError(f"Unknown job file format for {path}. Should be one of {JOB_FORMATS}")
+
+    return job_format
+
+
+def read_jobs(stream: IO[str], job_format: str = NDJSON) -> Iterator[Dict[str, Any]]:
+    """Read CWL jobs from a stream one at a time
+
+    Args:
+        stream (IO[str]): stream of NDJSON lines, YAML documents or a single JSON job
+        job_format (str): ndjson, yaml or json
+
+    Yields:
+        Dict[str, Any]: CWL jobs
+    """
+    if job_format == NDJSON:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+    elif job_format == YAML:
+        for job in yaml.safe_load_all(stream):
+            if job is not None:
+                yield job
+
+    elif job_format == JSON:
+        yield json.load(stream)
+
+    else:
+        raise ValueError(f"Invalid job format {job_format}. Should be one of {JOB_FORMATS}")
+
+
+def iter_jobs(path: str, job_format: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Stream the jobs of a CWL job file as CWLApp arguments
+
+    Only one job is in memory at a time, so job files of any size can be used.
+
+    Args:
+        path (str): job file, or - for stdin
+        job_format (Optional[str]): ndjson, yaml or json. Guessed from the
+            file extension if not given, NDJSON for stdin.
+
+    Yields:
+        Dict[str, Any]: keyword arguments for CWLApp.__call__
+    """
+    if path == "-":
+        for job in read_jobs(sys.stdin, job_format or NDJSON):
+            yield job_to_kwargs(job)
+        return
+
+    base_dir = os.path.dirname(path)
+    with open(path, "r", encoding="utf-8") as f:
+        for job in read_jobs(f, job_format or _job_format(path)):
+            yield job_to_kwargs(job, base_dir)
+
+
+def run_jobs(
+    app: Callable[..., Future],
+    jobs: Iterable[Dict[str, Any]],
+    max_in_flight: int = 100,
+    on_failure: Optional[Callable[[int, BaseException], None]] = None,
+) -> Tuple[int, int]:
+    """Run an app for each job with a bounded number of jobs in flight
+
+    Jobs are only read from the iterable when there is room for them, so a
+    generator like iter_jobs is never read ahead. If reading a job raises, the
+    jobs in flight are waited for before the exception is raised. Exceptions of
+    on_failure are logged and don't stop the run.
+
+    Args:
+        app (Callable[..., Future]): CWLApp to run
+        jobs (Iterable[Dict[str, Any]]): keyword arguments for each invocation
+        max_in_flight (int): maximum number of submitted, unfinished jobs
+        on_failure (Optional[Callable[[int, BaseException], None]]): called with
+            the index and exception of each failed job
+
+    Returns:
+        Tuple[int, int]: number of succeeded and failed jobs
+
+    Raises:
+        ValueError: if max_in_flight is less than 1
+    """
+    if max_in_flight < 1:
+        raise ValueError(f"max_in_flight should be at least 1, got {max_in_flight}")
+
+    in_flight = threading.BoundedSemaphore(max_in_flight)
+    lock = threading.Lock()
+    counts = {"succeeded": 0, "failed": 0}
+
+    def job_done(index: int, exception: Optional[BaseException]) -> None:
+        try:
+            with lock:
+                counts["failed" if exception else "succeeded"] += 1
+
+            if exception and on_failure:
+                on_failure(index, exception)
+
+        except Exception:  # pylint: disable=broad-except
+            # same for failures of app() and of the futures it returned
+            logger.exception("on_failure callback of job %d raised", index)
+
+        finally:
+            in_flight.release()
+
+    try:
+        for index, kwargs in enumerate(jobs):
+            in_flight.acquire()  # pylint: disable=consider-using-with
+            try:
+                future = app(**kwargs)
+            except Exception as e:  # pylint: disable=broad-except
+                job_done(index, e)
+                continue
+            except BaseException:
+                # e.g. KeyboardInterrupt, the slot must be free for the wait below
+                in_flight.release()
+                raise
+
+            future.add_done_callback(lambda fut, index=index: job_done(index, fut.exception()))
+
+    finally:
+        # wait for the jobs in flight
+        for _ in range(max_in_flight):
+            in_flight.acquire()  # pylint: disable=consider-using-with
+
+    return counts["succeeded"], counts["failed"]
@@ -0,0 +1,279 @@
+"""Module to retry failed CWLApp invocations"""
+
+import os
+import re
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from cwl.cwl_app.backends import Backend, LocalAppFuture
+
+# retries of the temporaryFailCodes of a CWL file when the CWLApp has no retry_policy
+DEFAULT_CWL_MAX_RETRIES = 3
+
+
+class RetryPolicy:
+    """Class to decide if and how a failed CWLApp invocation is retried"""
+
+    def __init__(
+        self,
+        max_retries: int = 0,
+        temporary_fail_codes: Iterable[int] = (),
+        permanent_fail_codes: Iterable[int] = (),
+        stderr_patterns: Iterable[str] = (),
+        backoff: float = 1.0,
+        backoff_factor: float = 2.0,
+        max_backoff: float = 60.0,
+        retry_backends: Sequence[Backend] = (),
+        clean_outputs: bool = True,
+    ) -> None:
+        """Class to decide if and how a failed CWLApp invocation is retried
+
+        A failure is temporary, and retried, if the exit code is one of the
+        temporary_fail_codes or the stderr of the attempt matches one of the
+        stderr_patterns. Permanent fail codes are never retried.
+
+        Args:
+            max_retries (int): Maximum number of retries of an invocation
+            temporary_fail_codes (Iterable[int]): Exit codes of transient failures
+            permanent_fail_codes (Iterable[int]): Exit codes that are never retried
+            stderr_patterns (Iterable[str]): Regexes for the stderr of transient failures
+            backoff (float): Seconds to wait before the first retry
+            backoff_factor (float): Multiplier of the wait for each further retry
+            max_backoff (float): Maximum seconds to wait before a retry
+            retry_backends (Sequence[Backend]): Backends for the retries, e.g. on other
+                executor labels. Retry n runs on retry_backends[n - 1], or the last one.
+                Retries run on the backend of the first attempt if empty.
+            clean_outputs (bool): Remove partial output files before a retry
+        """
+        self.max_retries = max_retries
+        self.temporary_fail_codes = frozenset(temporary_fail_codes)
+        self.permanent_fail_codes = frozenset(permanent_fail_codes)
+        self.stderr_patterns = [re.compile(pattern) for pattern in stderr_patterns]
+        self.backoff = backoff
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_backends = list(retry_backends)
+        self.clean_outputs = clean_outputs
+
+    def with_fail_codes(
+        self, temporary_fail_codes: Iterable[int], permanent_fail_codes: Iterable[int]
+    ) -> "RetryPolicy":
+        """Copy of the policy with additional fail codes, like the ones in the CWL file
+
+        Args:
+            temporary_fail_codes (Iterable[int]): Exit codes of transient failures
+            permanent_fail_codes (Iterable[int]): Exit codes that are never retried
+
+        Returns:
+            RetryPolicy: policy with both sets of fail codes
+        """
+        return RetryPolicy(
+            self.max_retries,
+            self.temporary_fail_codes | set(temporary_fail_codes),
+            self.permanent_fail_codes | set(permanent_fail_codes),
+            [pattern.pattern for pattern in self.stderr_patterns],
+            self.backoff,
+            self.backoff_factor,
+            self.max_backoff,
+            self.retry_backends,
+            self.clean_outputs,
+        )
+
+    def is_temporary(self, exitcode: Optional[int], stderr: str) -> bool:
+        """Check if a failure is transient
+
+        Args:
+            exitcode (Optional[int]): Exit code of the command, None if it didn't run
+            stderr (str): stderr written by the failed attempt
+
+        Returns:
+            bool: True if the failure can be retried
+        """
+        if exitcode in self.permanent_fail_codes:
+            return False
+
+        if exitcode in self.temporary_fail_codes:
+            return True
+
+        return any(pattern.search(stderr) for pattern in self.stderr_patterns)
+
+    def delay(self, retry: int) -> float:
+        """Seconds to wait before a retry
+
+        Args:
+            retry (int): Number of the retry, starting at 1
+
+        Returns:
+            float: exponential backoff delay
+        """
+        return min(self.backoff * self.backoff_factor ** (retry - 1), self.max_backoff)
+
+    def backend(self, retry: int, default: Backend) -> Backend:
+        """Backend to run a retry on
+
+        Args:
+            retry (int): Number of the retry, 0 for the first attempt
+            default (Backend): Backend of the first attempt
+
+        Returns:
+            Backend: backend for the retry
+        """
+        if retry == 0 or not self.retry_backends:
+            return default
+
+        return self.retry_backends[min(retry, len(self.retry_backends)) - 1]
+
+
+class FailureStats:
+    """Class to collect the failure statistics of a tool"""
+
+    def __init__(self) -> None:
+        """Attempts, successes, failures, retries and exit codes of failed attempts"""
+        self.__lock = threading.Lock()
+        self.attempts = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.exit_codes: Counter = Counter()
+
+    def __repr__(self) -> str:
+        return str(self.as_dict())
+
+    def record(self, exception: Optional[BaseException], retried: bool = False) -> None:
+        """Record the outcome of an attempt
+
+        Args:
+            exception (Optional[BaseException]): Exception of the attempt, None if it succeeded
+            retried (bool): Is the attempt going to be retried?
+        """
+        with self.__lock:
+            self.attempts += 1
+            if exception is None:
+                self.successes += 1
+                return
+
+            self.exit_codes[getattr(exception, "exitcode", None)] += 1
+            if retried:
+                self.retries += 1
+            else:
+                self.failures += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Statistics as a dict"""
+        with self.__lock:
+            return {
+                "attempts": self.attempts,
+                "successes": self.successes,
+                "failures": self.failures,
+                "retries": self.retries,
+                "exit_codes": dict(self.exit_codes),
+            }
+
+
+def remove_outputs(args: Dict[str, Any]) -> None:
+    """Remove the output files and stdout written by a failed attempt
+
+    Args:
+        args (Dict[str, Any]): backend args of the invocation
+    """
+    paths = [f.filepath for f in args["outputs"]]
+    if isinstance(args["stdout"], str):
+        paths.append(args["stdout"])
+
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _file_size(path: Optional[str]) -> int:
+    try:
+        return os.path.getsize(path) if isinstance(path, str) else 0
+    except FileNotFoundError:
+        return 0
+
+
+def _read_from(path: Optional[str], offset: int) -> str:
+    if not isinstance(path, str):
+        return ""
+
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return f.read().decode(errors="replace")
+    except FileNotFoundError:
+        return ""
+
+
+def submit_with_retries(
+    backend: Backend,
+    args: Dict[str, Any],
+    policy: RetryPolicy,
+    stats: FailureStats,
+) -> Future:
+    """Run the command, retrying transient failures
+
+    Args:
+        backend (Backend): Backend of the first attempt
+        args (Dict[str, Any]): backend args of the invocation
+        policy (RetryPolicy): how to retry failures
+        stats (FailureStats): failure statistics of the tool
+
+    Returns:
+        Future: future of the last attempt with an `outputs` list of DataFutures
+    """
+    future = LocalAppFuture(args["outputs"], args["stdout"], args["stderr"])
+
+    def attempt(retry: int) -> None:
+        # stderr is appended to, only the part written by this attempt is matched
+        stderr_offset = _file_size(args["stderr"])
+        try:
+            attempt_future = policy.backend(retry, backend).submit(args)
+        except Exception as e:  # pylint: disable=broad-except
+            stats.record(e)
+            future.set_exception(e)
+            return
+
+        attempt_future.add_done_callback(lambda fut: attempt_done(fut, retry, stderr_offset))
+
+    def attempt_done(attempt_future: Future, retry: int, stderr_offset: int) -> None:
+        exception = attempt_future.exception()
+        if exception is None:
+            stats.record(None)
+            future.set_result(attempt_future.result())
+            return
+
+        retried = retry < policy.max_retries and policy.is_temporary(
+            getattr(exception, "exitcode", None), _read_from(args["stderr"], stderr_offset)
+        )
+        stats.record(exception, retried)
+        if not retried:
+            future.set_exception(exception)
+            return
+
+        if policy.clean_outputs:
+            remove_outputs(args)
+
+        timer = threading.Timer(policy.delay(retry + 1), attempt, args=(retry + 1,))
+        timer.daemon = True
+        timer.start()
+
+    attempt(0)
+    return future
+
+
+def success_codes_command(command: str, success_codes: List[int]) -> str:
+    """Command that exits with 0 for any of the success codes
+
+    Args:
+        command (str): shell command
+        success_codes (List[int]): Exit codes that indicate success
+
+    Returns:
+        str: shell command
+    """
+    codes = "|".join(str(code) for code in success_codes)
+    return f"{command}; rc=$?; case $rc in {codes}) exit 0;; esac; exit $rc"
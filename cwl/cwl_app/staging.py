@@ -0,0 +1,104 @@
+"""Module to lay out the per-task working directory of a CWLApp invocation"""
+
+import os
+import shutil
+from collections import namedtuple
+from typing import List, Optional
+
+from parsl.data_provider.files import File
+
+SYMLINK = "symlink"
+HARDLINK = "hardlink"
+STAGING_MODES = (SYMLINK, HARDLINK)
+
+# Entry of the InitialWorkDirRequirement listing of a single invocation.
+# input_index points at the staged file in the parsl app inputs, content holds
+# the text of a literal entry. Exactly one of the two is set.
+WorkDirEntry = namedtuple("WorkDirEntry", ["entryname", "input_index", "content", "writable"])
+
+
+def stage_initial_workdir(
+    workdir: str,
+    entries: List[WorkDirEntry],
+    inputs: List[File],
+    staging: str = SYMLINK,
+) -> None:
+    """Create the working directory and stage the listed files into it
+
+    Files are linked instead of copied. Writable entries are copied so the
+    tool can't modify the original file.
+
+    Args:
+        workdir (str): Path of the per-task working directory
+        entries (List[WorkDirEntry]): InitialWorkDirRequirement listing
+        inputs (List[File]): Resolved input files of the invocation
+        staging (str): How to stage the files - symlink or hardlink
+    """
+    os.makedirs(workdir, exist_ok=True)
+
+    for entry in entries:
+        target = os.path.join(workdir, entry.entryname)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # left over by a previous attempt of a retried task
+        if os.path.lexists(target):
+            os.remove(target)
+
+        if entry.input_index is None:
+            with open(target, "w", encoding="utf-8") as f:
+                f.write(entry.content)
+            continue
+
+        source = os.path.abspath(inputs[entry.input_index].filepath)
+        if entry.writable:
+            shutil.copy2(source, target)
+
+        elif staging == HARDLINK:
+            try:
+                os.link(source, target)
+            except OSError:
+                # hard links can't cross file systems
+                os.symlink(source, target)
+
+        else:
+            os.symlink(source, target)
+
+
+def prepare_command(
+    command: str,
+    workdir: Optional[str] = None,
+    entries: Optional[List[WorkDirEntry]] = None,
+    inputs: Optional[List[File]] = None,
+    staging: str = SYMLINK,
+) -> str:
+    """Stage the working directory, if any, and get the command to run in it
+
+    The working directory is removed by a detached background process once
+    the command is done, on the worker that ran it.
+
+    Args:
+        command (str): Rendered command
+        workdir (Optional[str]): Path of the per-task working directory
+        entries (Optional[List[WorkDirEntry]]): InitialWorkDirRequirement listing
+        inputs (Optional[List[File]]): Resolved input files of the invocation
+        staging (str): How to stage the files - symlink or hardlink
+
+    Returns:
+        str: shell command
+    """
+    if workdir is None:
+        return command
+
+    try:
+        stage_initial_workdir(workdir, entries, inputs, staging)
+    except Exception:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+
+    # the directory is moved away first so a retry can't stage into it while
+    # it is being removed
+    return (
+        f'cd "{workdir}" && ( {command} ); rc=$?; cd /; '
+        f'mv "{workdir}" "{workdir}.$$.removed" && '
+        f'(rm -rf "{workdir}.$$.removed" </dev/null >/dev/null 2>&1 &); '
+        "exit $rc"
+    )
@@ -0,0 +1,16 @@
+"""Shared fixtures for the tests"""
+
+import parsl
+import pytest
+from parsl.configs.local_threads import config
+from parsl.errors import NoDataFlowKernelError
+
+
+@pytest.fixture(scope="session", autouse=True)
+def dfk():
+    """DataFlowKernel shared by all the tests, loaded once per session."""
+    # test_correctness loads the config when it is collected
+    try:
+        return parsl.dfk()
+    except NoDataFlowKernelError:
+        return parsl.load(config)
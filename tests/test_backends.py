@@ -0,0 +1,142 @@
+"""Tests for the backends that run CWLApps"""
+
+import os
+
+import pytest
+from parsl.data_provider.files import File
+
+from cwl import CWLApp
+from cwl.cwl_app.backends import CommandResult, LocalBackend, PythonAppBackend
+from cwl.cwl_app.incremental import SkippedAppFuture
+from tools import cat, sort, wc
+
+test_report_files = os.path.join(os.getcwd(), "tests", "test-reports")
+report = os.path.join(test_report_files, "january_report.csv")
+
+
+def test_python_backend_in_memory_output(tmp_path) -> None:
+    """Small outputs are returned in memory without writing the stdout file."""
+    result = wc(
+        num_lines=True,
+        input_files=[File(report)],
+        stdout=str(tmp_path / "wc.stdout"),
+        stderr=str(tmp_path / "wc.stderr"),
+        backend="python",
+    ).result()
+
+    assert result.returncode == 0
+    assert result.stdout.split()[1] == report
+    assert not os.path.exists(tmp_path / "wc.stdout")
+
+
+def test_python_backend_large_output(tmp_path) -> None:
+    """Outputs larger than max_in_memory_output are written to the stdout file."""
+    result = sort(
+        unsorted=File(report),
+        stdout=str(tmp_path / "sorted.csv"),
+        stderr=str(tmp_path / "sorted.stderr"),
+        backend=PythonAppBackend(max_in_memory_output=0),
+    ).result()
+
+    assert result.stdout is None
+    assert result.stderr == ""
+    with open(report, "r", encoding="utf-8") as f, open(
+        tmp_path / "sorted.csv", "r", encoding="utf-8"
+    ) as sorted_f:
+        assert sorted_f.read().splitlines() == sorted(f.read().splitlines())
+
+
+def test_local_backend_workflow(tmp_path) -> None:
+    """Apps on the local backend can be chained through their output DataFutures."""
+    local_cat = CWLApp(os.path.join("tools", "cwl_files", "cat.cwl"), backend=LocalBackend())
+
+    combined = local_cat(
+        from_files=[File(report), File(os.path.join(test_report_files, "february_report.csv"))],
+        redirect_to_file=str(tmp_path / "combined.csv"),
+        output_file=File(str(tmp_path / "combined.csv")),
+    )
+    counted = wc(
+        num_lines=True,
+        input_files=[combined.outputs[0]],
+        stdout=str(tmp_path / "wc.stdout"),
+        stderr=str(tmp_path / "wc.stderr"),
+        backend="local",
+    )
+
+    assert counted.result() == 0
+    with open(tmp_path / "combined.csv", "r", encoding="utf-8") as f:
+        num_lines = len(f.readlines())
+    with open(tmp_path / "wc.stdout", "r", encoding="utf-8") as f:
+        assert int(f.read().split()[0]) == num_lines
+
+
+def test_local_backend_failure(tmp_path) -> None:
+    """Non-zero exit codes and missing outputs fail the future."""
+    with pytest.raises(Exception):
+        cat(
+            from_files=[File(str(tmp_path / "missing.csv"))],
+            redirect_to_file=str(tmp_path / "out.csv"),
+            output_file=File(str(tmp_path / "out.csv")),
+            backend="local",
+        ).result()
+
+
+def test_invalid_backend() -> None:
+    """Unknown backend names are rejected."""
+    with pytest.raises(ValueError):
+        CWLApp(os.path.join("tools", "cwl_files", "cat.cwl"), backend="ssh")
+
+
+def test_python_backend_incremental(tmp_path) -> None:
+    """Python backend runs are only skipped if their stdout/stderr went to the files."""
+    find = CWLApp(
+        os.path.join("tools", "cwl_files", "find.cwl"),
+        incremental=True,
+        manifest_file=str(tmp_path / "manifest.json"),
+        backend="python",
+    )
+
+    def run_find(backend=None):
+        return find(
+            dir=test_report_files,
+            name="*.csv",
+            redirect_to_file=str(tmp_path / "found.txt"),
+            output_file=File(str(tmp_path / "found.txt")),
+            stdout=str(tmp_path / "find.stdout"),
+            stderr=str(tmp_path / "find.stderr"),
+            backend=backend,
+        )
+
+    assert run_find().result() == CommandResult(0, "", "")
+
+    # the output kept in memory can't be returned by a skipped invocation
+    in_memory = run_find()
+    assert not isinstance(in_memory, SkippedAppFuture)
+    assert in_memory.result() == CommandResult(0, "", "")
+    assert not os.path.exists(tmp_path / "find.stdout")
+
+    spilling = PythonAppBackend(max_in_memory_output=-1)
+    assert run_find(spilling).result() == CommandResult(0, None, None)
+
+    skipped = run_find(spilling)
+    assert isinstance(skipped, SkippedAppFuture)
+    assert skipped.result() == CommandResult(0, None, None)
+    assert os.path.exists(tmp_path / "find.stdout")
+
+
+def test_local_backend_waits_without_pool_threads(tmp_path) -> None:
+    """Downstream tasks don't hold pool threads while their inputs are produced."""
+    backend = LocalBackend(max_workers=1)
+    combined = cat(
+        from_files=[File(report)],
+        redirect_to_file=str(tmp_path / "combined.csv"),
+        output_file=File(str(tmp_path / "combined.csv")),
+        backend=backend,
+    )
+    sorted_future = sort(
+        unsorted=combined.outputs[0],
+        stdout=str(tmp_path / "sorted.csv"),
+        stderr=str(tmp_path / "sorted.stderr"),
+        backend=backend,
+    )
+    assert sorted_future.result(timeout=10) == 0
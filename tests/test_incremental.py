@@ -0,0 +1,164 @@
+"""Tests for incremental re-execution of CWLApps"""
+
+import os
+
+import pytest
+from parsl.data_provider.files import File
+
+from cwl import CWLApp
+from cwl.cwl_app.incremental import Manifest, SkippedAppFuture
+
+test_report_files = os.path.join(os.getcwd(), "tests", "test-reports")
+cat_cwl_file = os.path.join("tools", "cwl_files", "cat.cwl")
+wc_cwl_file = os.path.join("tools", "cwl_files", "wc.cwl")
+bash_cwl_file = os.path.join("tests", "test-cwl-files", "bash.cwl")
+
+
+def run_cat(cat: CWLApp, from_files, to_file: str):
+    """Run the cat CWLApp, appending from_files to to_file."""
+    return cat(
+        from_files=from_files,
+        redirect_to_file=to_file,
+        output_file=File(to_file),
+    )
+
+
+def test_skip_up_to_date_outputs(tmp_path) -> None:
+    """Second run with unchanged inputs and command is skipped."""
+    cat = CWLApp(cat_cwl_file, incremental=True, manifest_file=str(tmp_path / "manifest.json"))
+    report = os.path.join(test_report_files, "january_report.csv")
+    out = str(tmp_path / "out.csv")
+
+    first = run_cat(cat, [File(report)], out)
+    first.result()
+    assert not isinstance(first, SkippedAppFuture)
+    # recorded by the time the future resolves
+    assert Manifest(str(tmp_path / "manifest.json")).get([out]) is not None
+
+    with open(out, "r", encoding="utf-8") as f:
+        content = f.read()
+
+    second = run_cat(cat, [File(report)], out)
+    assert isinstance(second, SkippedAppFuture)
+    assert second.outputs[0].result().filepath == out
+
+    # cat appends, so a rerun would have duplicated the content
+    with open(out, "r", encoding="utf-8") as f:
+        assert f.read() == content
+
+
+def test_rerun_on_stale_outputs(tmp_path) -> None:
+    """A missing output or a newer input triggers a rerun."""
+    cat = CWLApp(cat_cwl_file, incremental=True, manifest_file=str(tmp_path / "manifest.json"))
+    report = str(tmp_path / "report.csv")
+    with open(report, "w", encoding="utf-8") as f:
+        f.write("month,total\n")
+    out = str(tmp_path / "out.csv")
+
+    run_cat(cat, [File(report)], out).result()
+    os.remove(out)
+    missing = run_cat(cat, [File(report)], out)
+    assert not isinstance(missing, SkippedAppFuture)
+    missing.result()
+
+    out_mtime = os.stat(out).st_mtime
+    os.utime(report, (out_mtime + 10, out_mtime + 10))
+    assert not isinstance(run_cat(cat, [File(report)], out), SkippedAppFuture)
+
+
+def test_changed_command_reruns(tmp_path) -> None:
+    """A different rendered command for the same output is not skipped."""
+    cat = CWLApp(cat_cwl_file, incremental=True, manifest_file=str(tmp_path / "manifest.json"))
+    out = str(tmp_path / "out.csv")
+    january = File(os.path.join(test_report_files, "january_report.csv"))
+    february = File(os.path.join(test_report_files, "february_report.csv"))
+
+    run_cat(cat, [january], out).result()
+    assert not isinstance(run_cat(cat, [january, february], out), SkippedAppFuture)
+
+
+def test_skipped_steps_chain(tmp_path) -> None:
+    """Skipped steps return DataFutures that downstream steps can consume."""
+    manifest_file = str(tmp_path / "manifest.json")
+    q1_files = [
+        File(os.path.join(test_report_files, f"{month}_report.csv"))
+        for month in ("january", "february", "march")
+    ]
+    q1_out = str(tmp_path / "q1_report.csv")
+    half_year_out = str(tmp_path / "half_year_report.csv")
+
+    for _ in range(2):
+        # a new CWLApp reads the manifest written by the previous run
+        cat = CWLApp(cat_cwl_file, incremental=True, manifest_file=manifest_file)
+        q1 = run_cat(cat, q1_files, q1_out)
+        half_year = run_cat(cat, [q1.outputs[0]], half_year_out)
+        half_year.result()
+
+    assert isinstance(q1, SkippedAppFuture)
+    assert isinstance(half_year, SkippedAppFuture)
+
+    with open(q1_out, "r", encoding="utf-8") as q1_f, open(
+        half_year_out, "r", encoding="utf-8"
+    ) as half_year_f:
+        assert q1_f.read() == half_year_f.read()
+
+
+def test_shared_manifest(tmp_path) -> None:
+    """Apps sharing a manifest file keep each other's records."""
+    manifest_file = str(tmp_path / "manifest.json")
+    report = File(os.path.join(test_report_files, "january_report.csv"))
+    cat_out = str(tmp_path / "cat.csv")
+    wc_out = str(tmp_path / "wc.stdout")
+
+    def run_both():
+        cat = CWLApp(cat_cwl_file, incremental=True, manifest_file=manifest_file)
+        wc = CWLApp(wc_cwl_file, incremental=True, manifest_file=manifest_file)
+        cat_future = run_cat(cat, [report], cat_out)
+        wc_future = wc(input_files=[report], stdout=wc_out, stderr=str(tmp_path / "wc.stderr"))
+        cat_future.result()
+        wc_future.result()
+        return cat_future, wc_future
+
+    run_both()
+    assert Manifest(manifest_file).get([cat_out])
+    assert Manifest(manifest_file).get([wc_out, str(tmp_path / "wc.stderr")])
+
+    cat_future, wc_future = run_both()
+    assert isinstance(cat_future, SkippedAppFuture)
+    assert isinstance(wc_future, SkippedAppFuture)
+
+
+def test_failed_rerun_is_not_skipped(tmp_path) -> None:
+    """Partial outputs of a failed run are not reused by the next run."""
+    bash = CWLApp(bash_cwl_file, incremental=True, manifest_file=str(tmp_path / "manifest.json"))
+    out = str(tmp_path / "out.txt")
+    flag = str(tmp_path / "ok")
+    output_paths = [out, str(tmp_path / "script.stdout"), str(tmp_path / "script.stderr")]
+
+    def run_script():
+        return bash(
+            script=f"echo partial > {out}; test -e {flag} && echo done > {out}",
+            output_file=File(out),
+            stdout=str(tmp_path / "script.stdout"),
+            stderr=str(tmp_path / "script.stderr"),
+        )
+
+    open(flag, "w", encoding="utf-8").close()
+    run_script().result()
+    assert Manifest(str(tmp_path / "manifest.json")).get(output_paths) is not None
+
+    # the rerun writes a fresh but partial output before failing
+    os.remove(out)
+    os.remove(flag)
+    with pytest.raises(Exception):
+        run_script().result()
+    assert Manifest(str(tmp_path / "manifest.json")).get(output_paths) is None
+
+    open(flag, "w", encoding="utf-8").close()
+    rerun = run_script()
+    assert not isinstance(rerun, SkippedAppFuture)
+    rerun.result()
+    with open(out, "r", encoding="utf-8") as f:
+        assert f.read() == "done\n"
+
+    assert isinstance(run_script(), SkippedAppFuture)
@@ -5,6 +5,7 @@ import os
 import pytest
 
 from cwl import CWLApp
+from cwl.cwl_app.cwl_app import InvalidCWL
 
 invalid_cwl_files = os.path.join(os.getcwd(), "tests", "invalid-cwl-files")
 
@@ -19,3 +20,15 @@ def test_invalid_dict_keys() -> None:
     """Test for the wc CWL CommandLineTool with invalid variable names as dict keys."""
     with pytest.raises(Exception):
         CWLApp(os.path.join(invalid_cwl_files, "touch_invalid.cwl"))
+
+
+def test_invalid_initial_workdir() -> None:
+    """Test for the ls CWL CommandLineTool with an unsupported InitialWorkDirRequirement listing."""
+    with pytest.raises(Exception):
+        CWLApp(os.path.join(invalid_cwl_files, "ls_invalid.cwl"))
+
+
+def test_reserved_id() -> None:
+    """Test for the echo CWL CommandLineTool with an input id clashing with a CWLApp keyword."""
+    with pytest.raises(InvalidCWL):
+        CWLApp(os.path.join(invalid_cwl_files, "echo_invalid.cwl"))
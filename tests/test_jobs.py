@@ -0,0 +1,173 @@
+"""Tests for loading CWL job files and running CWLApps for each job"""
+
+import json
+import os
+import logging
+import threading
+from concurrent.futures import Future
+
+import pytest
+from parsl.data_provider.files import File
+
+from cwl.cli import main
+from cwl.cwl_app.jobs import iter_jobs, job_to_kwargs, run_jobs
+
+test_report_files = os.path.join(os.getcwd(), "tests", "test-reports")
+wc_cwl_file = os.path.join("tools", "cwl_files", "wc.cwl")
+
+
+def test_job_to_kwargs() -> None:
+    """class: File objects are converted to parsl Files."""
+    kwargs = job_to_kwargs(
+        {
+            "num_lines": True,
+            "input_files": [
+                {"class": "File", "path": "january_report.csv"},
+                {"class": "File", "location": "file:///data/february%20report.csv"},
+            ],
+            "report": {"class": "File", "location": "https://example.com/march_report.csv"},
+            "stdout": "wc.stdout",
+        },
+        base_dir="reports",
+    )
+
+    assert kwargs["num_lines"] is True
+    assert kwargs["stdout"] == "wc.stdout"
+    assert [f.filepath for f in kwargs["input_files"]] == [
+        os.path.join("reports", "january_report.csv"),
+        "/data/february report.csv",
+    ]
+    assert isinstance(kwargs["report"], File)
+    assert kwargs["report"].scheme == "https"
+
+
+def test_iter_jobs(tmp_path) -> None:
+    """NDJSON and multi-document YAML job files are streamed."""
+    with open(tmp_path / "jobs.ndjson", "w", encoding="utf-8") as f:
+        for month in ("january", "february"):
+            f.write(json.dumps({"report": {"class": "File", "path": f"{month}.csv"}}) + "\n")
+
+    with open(tmp_path / "jobs.yaml", "w", encoding="utf-8") as f:
+        f.write("report:\n  class: File\n  path: january.csv\n---\nreport: february.csv\n")
+
+    ndjson_jobs = list(iter_jobs(str(tmp_path / "jobs.ndjson")))
+    yaml_jobs = list(iter_jobs(str(tmp_path / "jobs.yaml")))
+
+    assert [job["report"].filepath for job in ndjson_jobs] == [
+        str(tmp_path / "january.csv"),
+        str(tmp_path / "february.csv"),
+    ]
+    assert yaml_jobs[0]["report"].filepath == str(tmp_path / "january.csv")
+    assert yaml_jobs[1]["report"] == "february.csv"
+
+
+def test_run_jobs_bounded_in_flight() -> None:
+    """No more than max_in_flight jobs are submitted at once."""
+    lock = threading.Lock()
+    in_flight = []
+    max_seen = []
+
+    def app(**kwargs):
+        future = Future()
+        with lock:
+            in_flight.append(future)
+            max_seen.append(len(in_flight))
+
+        def finish():
+            with lock:
+                in_flight.remove(future)
+            if kwargs["fail"]:
+                future.set_exception(RuntimeError("failed"))
+            else:
+                future.set_result(0)
+
+        threading.Timer(0.01, finish).start()
+        return future
+
+    failures = []
+    succeeded, failed = run_jobs(
+        app,
+        ({"fail": i % 5 == 0} for i in range(20)),
+        max_in_flight=3,
+        on_failure=lambda index, e: failures.append(index),
+    )
+
+    assert (succeeded, failed) == (16, 4)
+    assert sorted(failures) == [0, 5, 10, 15]
+    assert max(max_seen) <= 3
+
+
+def test_run_jobs_failing_callback(caplog) -> None:
+    """A raising on_failure callback is logged for app and future failures alike."""
+
+    def app(**kwargs):
+        if kwargs["raise"]:
+            raise RuntimeError("not submitted")
+
+        future = Future()
+        threading.Timer(0.01, future.set_exception, args=(RuntimeError("failed"),)).start()
+        return future
+
+    def on_failure(index, exception):
+        raise ValueError(index)
+
+    with caplog.at_level(logging.ERROR, logger="cwl.cwl_app.jobs"):
+        counts = run_jobs(
+            app, ({"raise": i % 2 == 0} for i in range(6)), max_in_flight=2, on_failure=on_failure
+        )
+
+    assert counts == (0, 6)
+    assert len(caplog.records) == 6
+
+
+def test_run_jobs_failing_jobs_iterable() -> None:
+    """The jobs in flight are waited for if reading the jobs raises."""
+    futures = []
+
+    def app(**kwargs):
+        future = Future()
+        threading.Timer(0.05, future.set_result, args=(0,)).start()
+        futures.append(future)
+        return future
+
+    def jobs():
+        yield {}
+        yield {}
+        raise ValueError("invalid job file")
+
+    with pytest.raises(ValueError, match="invalid job file"):
+        run_jobs(app, jobs(), max_in_flight=3)
+
+    assert len(futures) == 2
+    assert all(future.done() for future in futures)
+
+
+def test_invalid_max_in_flight() -> None:
+    """max_in_flight must be at least 1."""
+    with pytest.raises(ValueError):
+        run_jobs(lambda **kwargs: Future(), [{}], max_in_flight=0)
+
+    with pytest.raises(SystemExit):
+        main([wc_cwl_file, "-", "--max-in-flight", "0"])
+
+
+def test_cli(tmp_path) -> None:
+    """cwl-parsl runs the tool for each job of the job file."""
+    jobs_file = tmp_path / "jobs.ndjson"
+    with open(jobs_file, "w", encoding="utf-8") as f:
+        for report in sorted(os.listdir(test_report_files)):
+            job = {
+                "num_lines": True,
+                "input_files": [{"class": "File", "path": os.path.join(test_report_files, report)}],
+                "stdout": str(tmp_path / f"{report}.stdout"),
+                "stderr": str(tmp_path / f"{report}.stderr"),
+            }
+            f.write(json.dumps(job) + "\n")
+
+    assert main([wc_cwl_file, str(jobs_file), "--backend", "local", "--max-in-flight", "2"]) == 0
+    assert len(list(tmp_path.glob("*.stdout"))) == len(os.listdir(test_report_files))
+
+    # missing stdout/stderr
+    with open(jobs_file, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"input_files": []}) + "\n")
+    assert main([wc_cwl_file, str(jobs_file), "--backend", "local"]) == 1
@@ -0,0 +1,156 @@
+"""Tests for retrying failed CWLApp invocations"""
+
+import os
+
+import pytest
+from parsl.data_provider.files import File
+
+from cwl import CWLApp
+from cwl.cwl_app.backends import LocalBackend
+from cwl.cwl_app.retries import RetryPolicy
+from tools import cat
+
+bash_cwl_file = os.path.join("tests", "test-cwl-files", "bash.cwl")
+
+# fails with EXITCODE the first time, after writing a partial out.txt
+FLAKY_SCRIPT = (
+    "test -e TMP/ran || "
+    "{ touch TMP/ran; echo partial > TMP/out.txt; echo MESSAGE >&2; exit EXITCODE; }; "
+    "test -e TMP/out.txt && exit 1; "
+    "echo done > TMP/out.txt"
+)
+
+
+class RecordingBackend(LocalBackend):
+    """Local backend counting the invocations it runs."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.submitted = 0
+
+    def submit(self, args):
+        self.submitted += 1
+        return super().submit(args)
+
+
+def run_script(app: CWLApp, tmp_path, exitcode: int, message: str = "failed"):
+    """Run the flaky script with the TMP placeholder replaced by tmp_path."""
+    script = (
+        FLAKY_SCRIPT.replace("TMP", str(tmp_path))
+        .replace("EXITCODE", str(exitcode))
+        .replace("MESSAGE", message)
+    )
+    return app(
+        script=script,
+        output_file=File(str(tmp_path / "out.txt")),
+        stdout=str(tmp_path / "script.stdout"),
+        stderr=str(tmp_path / "script.stderr"),
+    )
+
+
+def test_retry_temporary_fail_code(tmp_path) -> None:
+    """temporaryFailCodes from the CWL file are retried after removing partial outputs."""
+    app = CWLApp(bash_cwl_file, retry_policy=RetryPolicy(max_retries=2, backoff=0.01))
+    run_script(app, tmp_path, 75).result()
+
+    with open(tmp_path / "out.txt", "r", encoding="utf-8") as f:
+        assert f.read() == "done\n"
+
+    assert app.failure_stats.as_dict() == {
+        "attempts": 2,
+        "successes": 1,
+        "failures": 0,
+        "retries": 1,
+        "exit_codes": {75: 1},
+    }
+
+
+def test_cwl_temporary_fail_codes_without_policy(tmp_path) -> None:
+    """temporaryFailCodes from the CWL file are retried without a retry_policy."""
+    app = CWLApp(bash_cwl_file)
+    run_script(app, tmp_path, 75).result()
+
+    with open(tmp_path / "out.txt", "r", encoding="utf-8") as f:
+        assert f.read() == "done\n"
+
+    assert app.failure_stats.as_dict()["retries"] == 1
+
+
+def test_permanent_fail_code(tmp_path) -> None:
+    """permanentFailCodes are never retried."""
+    app = CWLApp(
+        bash_cwl_file,
+        retry_policy=RetryPolicy(max_retries=2, temporary_fail_codes=[2], backoff=0.01),
+    )
+    with pytest.raises(Exception):
+        run_script(app, tmp_path, 2).result()
+
+    assert app.failure_stats.attempts == 1
+    assert app.failure_stats.failures == 1
+
+
+def test_retry_stderr_pattern(tmp_path) -> None:
+    """Failures with a matching stderr are retried."""
+    app = CWLApp(
+        bash_cwl_file,
+        retry_policy=RetryPolicy(
+            max_retries=1, stderr_patterns=[r"Stale (file|NFS) handle"], backoff=0.01
+        ),
+    )
+    run_script(app, tmp_path, 1, message="Stale file handle").result()
+    assert app.failure_stats.retries == 1
+
+    # unknown failures are not retried
+    os.remove(tmp_path / "ran")
+    with pytest.raises(Exception):
+        run_script(app, tmp_path, 1, message="Permission denied").result()
+
+
+def test_success_codes(tmp_path) -> None:
+    """successCodes other than 0 are successful runs."""
+    app = CWLApp(bash_cwl_file)
+    run_script(app, tmp_path, 3).result()
+    assert app.failure_stats.successes == 1
+
+
+def test_retry_backends(tmp_path) -> None:
+    """Retries are resubmitted to the retry backends."""
+    retry_backend = RecordingBackend()
+    app = CWLApp(
+        bash_cwl_file,
+        retry_policy=RetryPolicy(max_retries=1, backoff=0.01, retry_backends=[retry_backend]),
+    )
+    run_script(app, tmp_path, 75).result()
+    assert retry_backend.submitted == 1
+
+
+def test_backoff() -> None:
+    """Retries are delayed with exponential backoff."""
+    policy = RetryPolicy(backoff=1, backoff_factor=2, max_backoff=5)
+    assert [policy.delay(retry) for retry in range(1, 5)] == [1, 2, 4, 5]
+
+
+def test_retry_feeding_local_downstream(tmp_path) -> None:
+    """A retried upstream task can still run when downstream tasks are waiting for it."""
+    backend = LocalBackend(max_workers=1)
+    app = CWLApp(bash_cwl_file, retry_policy=RetryPolicy(max_retries=1, backoff=0.01))
+    upstream = app(
+        script=FLAKY_SCRIPT.replace("TMP", str(tmp_path))
+        .replace("EXITCODE", "75")
+        .replace("MESSAGE", "failed"),
+        output_file=File(str(tmp_path / "out.txt")),
+        stdout=str(tmp_path / "script.stdout"),
+        stderr=str(tmp_path / "script.stderr"),
+        backend=backend,
+    )
+    downstream = cat(
+        from_files=[upstream.outputs[0]],
+        redirect_to_file=str(tmp_path / "copy.txt"),
+        output_file=File(str(tmp_path / "copy.txt")),
+        backend=backend,
+    )
+
+    assert downstream.result(timeout=10) == 0
+    assert app.failure_stats.retries == 1
+    with open(tmp_path / "copy.txt", "r", encoding="utf-8") as f:
+        assert f.read() == "done\n"
@@ -0,0 +1,100 @@
+"""Tests for stdin and InitialWorkDirRequirement support"""
+
+import os
+import time
+
+from parsl.data_provider.files import File
+
+from cwl import CWLApp
+from tools import cat, ls, sort
+
+test_report_files = os.path.join(os.getcwd(), "tests", "test-reports")
+ls_cwl_file = os.path.join("tools", "cwl_files", "ls.cwl")
+reports = sorted(os.listdir(test_report_files))
+
+
+def wait_for_cleanup(workdir_root: str, timeout: float = 5) -> None:
+    """Wait for the working directories to be removed in the background."""
+    deadline = time.monotonic() + timeout
+    while os.listdir(workdir_root) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_stdin() -> None:
+    """Test for the sort CWL CommandLineTool reading from stdin."""
+    assert sort.get_command(unsorted=File("report.csv"), reverse=True) == "sort -r < report.csv"
+
+
+def test_stdin_from_data_future(tmp_path) -> None:
+    """Output of an app is piped to the stdin of another."""
+    report = os.path.join(test_report_files, "january_report.csv")
+    combined = cat(
+        from_files=[File(report)],
+        redirect_to_file=str(tmp_path / "combined.csv"),
+        output_file=File(str(tmp_path / "combined.csv")),
+    )
+    sort(
+        unsorted=combined.outputs[0],
+        stdout=str(tmp_path / "sorted.csv"),
+        stderr=str(tmp_path / "sorted.stderr"),
+    ).result()
+
+    with open(report, "r", encoding="utf-8") as f:
+        expected = sorted(f.read().splitlines())
+
+    with open(tmp_path / "sorted.csv", "r", encoding="utf-8") as f:
+        assert f.read().splitlines() == expected
+
+
+def test_initial_workdir(tmp_path) -> None:
+    """Files are staged into a per-task working directory that is removed afterwards."""
+    workdir_root = tmp_path / "workdirs"
+    workdir_root.mkdir()
+
+    for staging in ("symlink", "hardlink"):
+        app = CWLApp(ls_cwl_file, staging=staging, workdir_root=str(workdir_root))
+        stdout = str(tmp_path / f"ls_{staging}.txt")
+        app(
+            files=[File(os.path.join(test_report_files, report)) for report in reports],
+            stdout=stdout,
+            stderr=str(tmp_path / f"ls_{staging}.stderr"),
+        ).result()
+
+        with open(stdout, "r", encoding="utf-8") as f:
+            assert f.read().split() == reports
+
+        wait_for_cleanup(str(workdir_root))
+        assert not os.listdir(workdir_root)
+
+    # the original files are not affected by the cleanup
+    assert sorted(os.listdir(test_report_files)) == reports
+
+
+def test_initial_workdir_removed_by_worker(tmp_path) -> None:
+    """The working directory is removed by the command itself, for every backend."""
+    workdir_root = tmp_path / "workdirs"
+    workdir_root.mkdir()
+    app = CWLApp(ls_cwl_file, workdir_root=str(workdir_root))
+
+    for backend in ("python", "local"):
+        app(
+            files=[File(os.path.join(test_report_files, reports[0]))],
+            stdout=str(tmp_path / f"ls_{backend}.txt"),
+            stderr=str(tmp_path / f"ls_{backend}.stderr"),
+            backend=backend,
+        ).result()
+
+        wait_for_cleanup(str(workdir_root))
+        assert not os.listdir(workdir_root)
+
+
+def test_initial_workdir_default_root(tmp_path) -> None:
+    """Test for the ls CWL CommandLineTool with the default working directory root."""
+    ls(
+        files=[File(os.path.join(test_report_files, reports[0]))],
+        stdout=str(tmp_path / "ls.txt"),
+        stderr=str(tmp_path / "ls.stderr"),
+    ).result()
+
+    with open(tmp_path / "ls.txt", "r", encoding="utf-8") as f:
+        assert f.read().split() == reports[:1]
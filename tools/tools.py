@@ -13,3 +13,7 @@ find = CWLApp(os.path.join("tools", "cwl_files", "find.cwl"))
 touch = CWLApp(os.path.join("tools", "cwl_files", "touch.cwl"))
 
 wc = CWLApp(os.path.join("tools", "cwl_files", "wc.cwl"))
+
+sort = CWLApp(os.path.join("tools", "cwl_files", "sort.cwl"))
+
+ls = CWLApp(os.path.join("tools", "cwl_files", "ls.cwl"))